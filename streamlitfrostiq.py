@@ -1,5 +1,12 @@
+import io
+import warnings
+from collections import Counter
+from typing import Iterator, Optional
+
 import streamlit as st
 import pandas as pd
+import numpy as np
+from pandas.tseries.api import guess_datetime_format
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -12,6 +19,269 @@ st.set_page_config(
 
 st.title("Interactive Media Intelligence Dashboard")
 
+# --- Data Loading & Cleaning ---
+REQUIRED_COLUMNS = ['Date', 'Platform', 'Sentiment', 'Location', 'Engagements', 'Media Type']
+CATEGORY_COLUMNS = ('Sentiment', 'Platform', 'Location', 'Media Type')
+# Uploads are parsed and cleaned this many rows at a time
+CSV_CHUNK_ROWS = 200_000
+# The date format is sniffed once from the first non-null dates within this many leading rows
+DATE_SNIFF_ROWS = 1_000
+# ...and guessed from at most this many of those non-null dates
+DATE_SNIFF_VALUES = 50
+
+
+def sniff_date_format(dates: pd.Series) -> Optional[str]:
+    """Guess the most common date format among the first non-null values, or None if none is recognized."""
+    sample = dates.dropna().astype(str).head(DATE_SNIFF_VALUES)
+    with warnings.catch_warnings():
+        # Guessing day-first formats like %d/%m/%Y warns on every value; the guess itself is what's wanted
+        warnings.simplefilter('ignore', UserWarning)
+        guessed_formats = Counter(guess_datetime_format(value) for value in sample)
+    guessed_formats.pop(None, None)
+    if not guessed_formats:
+        return None
+    return guessed_formats.most_common(1)[0][0]
+
+
+def parse_dates(dates: pd.Series, date_format: Optional[str]) -> pd.Series:
+    """Convert a raw date column to datetime, coercing unparseable values to NaT.
+
+    With a sniffed format pandas uses its vectorized fixed-format parser, and values
+    that don't match it become NaT and count as invalid. Without one, every value goes
+    through the generic parser individually, so the result doesn't depend on chunking.
+    """
+    if date_format is None:
+        return pd.to_datetime(dates, format='mixed', errors='coerce', cache=True)
+    return pd.to_datetime(dates, format=date_format, errors='coerce', cache=True)
+
+
+def clean_chunk(df: pd.DataFrame, date_format: Optional[str]) -> tuple[pd.DataFrame, dict]:
+    """Clean a block of raw CSV rows, returning the compact cleaned rows and their cleaning stats."""
+    # Keep track of cleaning stats
+    original_rows = len(df)
+
+    # Ensure all required columns exist, fill with empty string if not
+    for col in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            df[col] = '' # Add missing column with empty strings
+
+    # Convert 'Date' to datetime, coercing errors to NaT
+    parsed_dates = parse_dates(df['Date'], date_format)
+    valid_dates = parsed_dates.notna()
+    invalid_date_count = int((~valid_dates).sum() - df['Date'].isnull().sum()) # Count new NaT values
+
+    # Fill missing 'Engagements' with 0 and convert to numeric
+    # First, count how many were originally missing or non-numeric
+    coerced_engagements = pd.to_numeric(df['Engagements'], errors='coerce')
+    blank_engagements = df['Engagements'].astype(str).str.strip() == ''
+    missing_engagements_count = int((coerced_engagements.isna() | blank_engagements).sum())
+    # Store in the smallest integer type that fits; groupby sums still accumulate in int64
+    engagements = pd.to_numeric(coerced_engagements.fillna(0).astype(np.int64), downcast='integer')
+
+    # Drop rows where 'Date' is NaT after coercion (invalid dates)
+    # Each required column is sliced once with the same mask instead of copying the whole frame
+    cleaned_columns = {'Date': parsed_dates, 'Engagements': engagements}
+    df = pd.DataFrame(
+        {col: cleaned_columns.get(col, df[col])[valid_dates] for col in REQUIRED_COLUMNS},
+        copy=False
+    )
+
+    # Store the low-cardinality text columns as categories so counts and groupbys run on int codes
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+
+    stats = {
+        'original_rows': original_rows,
+        'cleaned_rows': len(df),
+        'missing_engagements_count': missing_engagements_count,
+        'invalid_date_count': invalid_date_count,
+    }
+    return df, stats
+
+
+def read_clean_chunks(file_bytes: bytes) -> Iterator[tuple[pd.DataFrame, dict]]:
+    """Parse the uploaded CSV bytes in chunks, yielding each chunk's cleaned rows and cleaning stats.
+
+    Chunks are read lazily, so only one chunk of raw strings is held in memory at a time.
+    """
+    # Normalize column names for robust processing
+    # Create a mapping for robust column identification
+    column_map = {
+        'date': 'Date',
+        'platform': 'Platform',
+        'sentiment': 'Sentiment',
+        'location': 'Location',
+        'engagements': 'Engagements',
+        'media type': 'Media Type'
+    }
+
+    # Read just the leading rows first and map the recognized columns to their normalized names
+    head = pd.read_csv(io.BytesIO(file_bytes), nrows=DATE_SNIFF_ROWS, dtype=str)
+    column_mapping = {col: column_map[col.lower().strip()] for col in head.columns if col.lower().strip() in column_map}
+    # Sniff the date format once so every chunk is parsed the same way
+    date_columns = [col for col, name in column_mapping.items() if name == 'Date']
+    date_format = sniff_date_format(head[date_columns[0]]) if date_columns else None
+    # Only parse the recognized columns (the whole file when none match, so the row count is still reported)
+    usecols = list(column_mapping) or None
+
+    # Read the CSV into a pandas DataFrame
+    # Every column is coerced during cleaning, so read them all as strings and skip dtype inference
+    # (The pyarrow engine can't be used here: it infers types before the str cast, so blanks
+    # would come back as 'None'/'nan' and numbers with gaps as '2134.0')
+    chunks = pd.read_csv(io.BytesIO(file_bytes), usecols=usecols, dtype=str, chunksize=CSV_CHUNK_ROWS)
+    for chunk in chunks:
+        yield clean_chunk(chunk.rename(columns=column_mapping), date_format)
+
+
+def count_categories(values: pd.Series) -> pd.Series:
+    """Count each category of a categorical column, indexed by category label."""
+    # Tally the integer codes directly; missing values have code -1 and are skipped like in value_counts()
+    codes = values.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(values.cat.categories))
+    return pd.Series(counts, index=pd.Index(values.cat.categories, name=values.name), name='Count')
+
+
+def sum_by_category(engagements: pd.Series, values: pd.Series) -> pd.Series:
+    """Sum engagements per category of a categorical column, indexed by category label."""
+    sums = engagements.groupby(values, sort=False, observed=True).sum()
+    # Plain labels let partials from chunks with different categories be concatenated
+    sums.index = sums.index.astype(object)
+    return sums
+
+
+def aggregate_chunk(df: pd.DataFrame) -> dict[str, pd.Series]:
+    """Reduce one cleaned chunk to its partial counts and engagement sums."""
+    engagements = df['Engagements']
+    return {
+        'sentiment_counts': count_categories(df['Sentiment']),
+        'engagement_by_date': engagements.groupby(df['Date'].dt.floor('D'), sort=False).sum(),
+        'platform_engagements': sum_by_category(engagements, df['Platform']),
+        'media_type_counts': count_categories(df['Media Type']),
+        'engagements_by_location': sum_by_category(engagements, df['Location']),
+    }
+
+
+def merge_aggregates(partials: list[dict[str, pd.Series]]) -> dict[str, pd.DataFrame]:
+    """Sum the per-chunk partials and shape them into the five chart aggregates."""
+    # Sorting the merged keys makes tie order independent of how the file was chunked
+    totals = {
+        key: pd.concat([partial[key] for partial in partials]).groupby(level=0, sort=True).sum()
+        for key in partials[0]
+    }
+
+    sentiment_counts = totals['sentiment_counts'].sort_values(ascending=False, kind='stable').reset_index()
+
+    engagement_by_date = totals['engagement_by_date'].reset_index()
+    engagement_by_date.columns = ['Date', 'Total Engagements']
+
+    platform_engagements = totals['platform_engagements'].sort_values(ascending=False, kind='stable').reset_index()
+
+    media_type_counts = totals['media_type_counts'].sort_values(ascending=False, kind='stable').reset_index()
+
+    engagements_by_location = totals['engagements_by_location'].nlargest(5).reset_index()
+
+    return {
+        'sentiment_counts': sentiment_counts,
+        'engagement_by_date': engagement_by_date,
+        'platform_engagements': platform_engagements,
+        'media_type_counts': media_type_counts,
+        'engagements_by_location': engagements_by_location,
+    }
+
+
+@st.cache_data(show_spinner=False)
+def load_dashboard_data(file_bytes: bytes) -> tuple[dict, dict[str, pd.DataFrame]]:
+    """Clean and aggregate the uploaded CSV bytes, returning the cleaning stats and chart aggregates.
+
+    Cached on the file contents. Each chunk is reduced to small partial totals before the
+    next one is read, so peak memory is bounded by the chunk size rather than the file size.
+    """
+    stats = dict.fromkeys(['original_rows', 'cleaned_rows', 'missing_engagements_count', 'invalid_date_count'], 0)
+    partials = []
+    for chunk, chunk_stats in read_clean_chunks(file_bytes):
+        partials.append(aggregate_chunk(chunk))
+        for key, value in chunk_stats.items():
+            stats[key] += value
+    return stats, merge_aggregates(partials)
+
+
+# --- Chart Builders ---
+# Each builder is cached on its small aggregated input, so reruns reuse the figure
+@st.cache_data(show_spinner=False)
+def build_sentiment_fig(sentiment_counts: pd.DataFrame) -> go.Figure:
+    fig_sentiment = px.pie(
+        sentiment_counts,
+        names='Sentiment',
+        values='Count',
+        title='Sentiment Breakdown',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    # Pull out the leading (largest) slice
+    pull = np.zeros(len(sentiment_counts))
+    pull[:1] = 0.05
+    fig_sentiment.update_traces(textinfo='percent+label', pull=pull.tolist())
+    return fig_sentiment
+
+
+@st.cache_data(show_spinner=False)
+def build_engagement_trend_fig(engagement_by_date: pd.DataFrame) -> go.Figure:
+    return px.line(
+        engagement_by_date,
+        x='Date',
+        y='Total Engagements',
+        title='Engagement Trend Over Time',
+        markers=True,
+        line_shape='linear',
+        color_discrete_sequence=['#4f46e5'] # Indigo-600
+    )
+
+
+@st.cache_data(show_spinner=False)
+def build_platform_fig(platform_engagements: pd.DataFrame) -> go.Figure:
+    return px.bar(
+        platform_engagements,
+        x='Platform',
+        y='Engagements',
+        title='Platform Engagements',
+        color_discrete_sequence=['#3b82f6'] # Blue-500
+    )
+
+
+@st.cache_data(show_spinner=False)
+def build_media_type_fig(media_type_counts: pd.DataFrame) -> go.Figure:
+    fig_media_type = px.pie(
+        media_type_counts,
+        names='Media Type',
+        values='Count',
+        title='Media Type Mix',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Vivid
+    )
+    # Pull out the leading (largest) slice
+    pull = np.zeros(len(media_type_counts))
+    pull[:1] = 0.05
+    fig_media_type.update_traces(textinfo='percent+label', pull=pull.tolist())
+    return fig_media_type
+
+
+@st.cache_data(show_spinner=False)
+def build_locations_fig(engagements_by_location: pd.DataFrame) -> go.Figure:
+    return px.bar(
+        engagements_by_location,
+        x='Location',
+        y='Engagements',
+        title='Top 5 Locations by Engagements',
+        color_discrete_sequence=['#d946ef'] # Purple-500
+    )
+
+
+# --- Insight Rendering ---
+def render_insights(insights: list[str]) -> None:
+    """Render a section's "Top 3 Insights:" heading and list as a single markdown element."""
+    st.markdown("### Top 3 Insights:\n<ul>" + "".join(insights) + "</ul>", unsafe_allow_html=True)
+
+
 # --- 1. Upload Your CSV File ---
 st.header("1. Upload Your CSV File")
 st.markdown("Please upload a CSV file with the following columns: `Date`, `Platform`, `Sentiment`, `Location`, `Engagements`, `Media Type`.")
@@ -20,63 +290,16 @@ uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
 
 if uploaded_file is not None:
     try:
-        # Read the CSV into a pandas DataFrame
-        df = pd.read_csv(uploaded_file)
+        # Passing the raw bytes keys the cache on the file's contents
+        stats, aggregates = load_dashboard_data(uploaded_file.getvalue())
 
         # --- 2. Clean the Data ---
         st.header("2. Data Cleaning Summary")
 
-        # Keep track of cleaning stats
-        original_rows = len(df)
-        missing_engagements_count = 0
-        invalid_date_count = 0
-
-        # Normalize column names for robust processing
-        # Create a mapping for robust column identification
-        column_map = {
-            'date': 'Date',
-            'platform': 'Platform',
-            'sentiment': 'Sentiment',
-            'location': 'Location',
-            'engagements': 'Engagements',
-            'media type': 'Media Type'
-        }
-        
-        # Rename columns based on normalized versions
-        df.columns = [col.lower().strip() for col in df.columns]
-        df = df.rename(columns=column_map)
-
-        # Ensure all required columns exist, fill with empty string if not
-        required_columns = ['Date', 'Platform', 'Sentiment', 'Location', 'Engagements', 'Media Type']
-        for col in required_columns:
-            if col not in df.columns:
-                df[col] = '' # Add missing column with empty strings
-
-        # Convert 'Date' to datetime, coercing errors to NaT
-        initial_date_nulls = df['Date'].isnull().sum()
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        invalid_date_count = df['Date'].isnull().sum() - initial_date_nulls # Count new NaT values
-
-        # Fill missing 'Engagements' with 0 and convert to numeric
-        # First, count how many were originally missing or non-numeric
-        for index, row in df.iterrows():
-            if pd.isna(row['Engagements']) or str(row['Engagements']).strip() == '':
-                missing_engagements_count += 1
-            else:
-                try:
-                    # Attempt to convert to numeric, if it fails, increment count
-                    if not pd.api.types.is_numeric_dtype(type(row['Engagements'])):
-                         float(row['Engagements'])
-                except ValueError:
-                    missing_engagements_count += 1
-                    
-        df['Engagements'] = pd.to_numeric(df['Engagements'], errors='coerce').fillna(0).astype(int)
-
-
-        # Drop rows where 'Date' is NaT after coercion (invalid dates)
-        df.dropna(subset=['Date'], inplace=True)
-
-        cleaned_rows = len(df)
+        original_rows = stats['original_rows']
+        cleaned_rows = stats['cleaned_rows']
+        missing_engagements_count = stats['missing_engagements_count']
+        invalid_date_count = stats['invalid_date_count']
 
         st.write(f"Original rows: {original_rows}")
         st.write(f"Valid rows processed: {cleaned_rows}")
@@ -92,151 +315,113 @@ if uploaded_file is not None:
 
             # --- Sentiment Breakdown (Pie Chart) ---
             st.header("3. Sentiment Breakdown")
-            sentiment_counts = df['Sentiment'].value_counts().reset_index()
-            sentiment_counts.columns = ['Sentiment', 'Count']
-            fig_sentiment = px.pie(
-                sentiment_counts,
-                names='Sentiment',
-                values='Count',
-                title='Sentiment Breakdown',
-                hole=0.4,
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
-            fig_sentiment.update_traces(textinfo='percent+label', pull=[0.05 if s == sentiment_counts['Sentiment'].iloc[0] else 0 for s in sentiment_counts['Sentiment']])
-            st.plotly_chart(fig_sentiment, use_container_width=True)
-
-            st.subheader("Top 3 Insights:")
+            sentiment_counts = aggregates['sentiment_counts']
+            fig_sentiment = build_sentiment_fig(sentiment_counts)
+            st.plotly_chart(fig_sentiment, use_container_width=True, config={'staticPlot': True})
+
             total_sentiments = sentiment_counts['Count'].sum()
             insights = []
-            if len(sentiment_counts) > 0:
-                dominant_sentiment = sentiment_counts.iloc[0]
+            top_sentiments = sentiment_counts.head(3).to_dict('records')
+            if len(top_sentiments) > 0:
+                dominant_sentiment = top_sentiments[0]
                 insights.append(f"<li>The dominant sentiment is <b>{dominant_sentiment['Sentiment']}</b>, accounting for <b>{(dominant_sentiment['Count'] / total_sentiments * 100):.1f}%</b> of all mentions.</li>")
-            if len(sentiment_counts) > 1:
-                second_sentiment = sentiment_counts.iloc[1]
+            if len(top_sentiments) > 1:
+                second_sentiment = top_sentiments[1]
                 insights.append(f"<li>The second most common sentiment is <b>{second_sentiment['Sentiment']}</b>, representing <b>{(second_sentiment['Count'] / total_sentiments * 100):.1f}%</b>.</li>")
-            if len(sentiment_counts) > 2:
-                third_sentiment = sentiment_counts.iloc[2]
+            if len(top_sentiments) > 2:
+                third_sentiment = top_sentiments[2]
                 insights.append(f"<li>The third most common sentiment is <b>{third_sentiment['Sentiment']}</b>, representing <b>{(third_sentiment['Count'] / total_sentiments * 100):.1f}%</b>.</li>")
-            st.markdown("<ul>" + "".join(insights) + "</ul>", unsafe_allow_html=True)
+            render_insights(insights)
 
             # --- Engagement Trend over Time (Line Chart) ---
             st.header("4. Engagement Trend over Time")
-            engagement_by_date = df.groupby(df['Date'].dt.date)['Engagements'].sum().reset_index()
-            engagement_by_date.columns = ['Date', 'Total Engagements']
-            fig_engagement_trend = px.line(
-                engagement_by_date,
-                x='Date',
-                y='Total Engagements',
-                title='Engagement Trend Over Time',
-                markers=True,
-                line_shape='linear',
-                color_discrete_sequence=['#4f46e5'] # Indigo-600
-            )
+            engagement_by_date = aggregates['engagement_by_date']
+            fig_engagement_trend = build_engagement_trend_fig(engagement_by_date)
             st.plotly_chart(fig_engagement_trend, use_container_width=True)
 
-            st.subheader("Top 3 Insights:")
             insights = []
             if len(engagement_by_date) > 0:
-                max_engagement_row = engagement_by_date.loc[engagement_by_date['Total Engagements'].idxmax()]
-                insights.append(f"<li>The peak engagement occurred on <b>{max_engagement_row['Date']}</b>, with a total of <b>{max_engagement_row['Total Engagements']:,}</b> engagements.</li>")
+                daily_totals = engagement_by_date['Total Engagements'].to_numpy()
+                peak_index = int(daily_totals.argmax())
+                peak_date = engagement_by_date['Date'].iat[peak_index]
+                peak_engagement = int(daily_totals[peak_index])
+                insights.append(f"<li>The peak engagement occurred on <b>{peak_date:%Y-%m-%d}</b>, with a total of <b>{peak_engagement:,}</b> engagements.</li>")
 
-                avg_engagement = engagement_by_date['Total Engagements'].mean()
+                avg_engagement = daily_totals.mean()
                 insights.append(f"<li>The average daily engagement over the period is approximately <b>{avg_engagement:,.0f}</b>.</li>")
 
                 if len(engagement_by_date) > 1:
-                    start_engagement = engagement_by_date['Total Engagements'].iloc[0]
-                    end_engagement = engagement_by_date['Total Engagements'].iloc[-1]
+                    start_engagement = daily_totals[0]
+                    end_engagement = daily_totals[-1]
                     if end_engagement > start_engagement * 1.1:
                         insights.append('<li>There is an observable <b>upward trend</b> in engagements over the period.</li>')
                     elif end_engagement < start_engagement * 0.9:
                         insights.append('<li>There is an observable <b>downward trend</b> in engagements over the period.</li>')
                     else:
                         insights.append('<li>Engagements remained relatively <b>stable</b> throughout the period.</li>')
-            st.markdown("<ul>" + "".join(insights) + "</ul>", unsafe_allow_html=True)
+            render_insights(insights)
 
 
             # --- Platform Engagements (Bar Chart) ---
             st.header("5. Platform Engagements")
-            platform_engagements = df.groupby('Platform')['Engagements'].sum().reset_index()
-            platform_engagements = platform_engagements.sort_values(by='Engagements', ascending=False)
-            fig_platform = px.bar(
-                platform_engagements,
-                x='Platform',
-                y='Engagements',
-                title='Platform Engagements',
-                color_discrete_sequence=['#3b82f6'] # Blue-500
-            )
+            platform_engagements = aggregates['platform_engagements']
+            fig_platform = build_platform_fig(platform_engagements)
             st.plotly_chart(fig_platform, use_container_width=True)
 
-            st.subheader("Top 3 Insights:")
             insights = []
-            if len(platform_engagements) > 0:
-                most_engaging_platform = platform_engagements.iloc[0]
+            top_platforms = platform_engagements.head(2).to_dict('records')
+            if len(top_platforms) > 0:
+                most_engaging_platform = top_platforms[0]
                 insights.append(f"<li><b>{most_engaging_platform['Platform']}</b> is the most engaging platform, contributing <b>{most_engaging_platform['Engagements']:,}</b> total engagements.</li>")
-            if len(platform_engagements) > 1:
-                second_platform = platform_engagements.iloc[1]
+            if len(top_platforms) > 1:
+                second_platform = top_platforms[1]
                 percentage_difference = ((most_engaging_platform['Engagements'] - second_platform['Engagements']) / second_platform['Engagements'] * 100) if second_platform['Engagements'] != 0 else float('inf')
-                insights.append(f"<li><b>{most_engaging_platform['Platform']}</b> generated {'<b>' + str(percentage_difference:.1f) + '% more</b>' if percentage_difference > 0 else 'fewer'} engagements than the second most engaging platform, <b>{second_platform['Platform']}</b>.</li>")
+                sign_word = 'more' if percentage_difference >= 0 else 'fewer'
+                insights.append(f"<li><b>{most_engaging_platform['Platform']}</b> generated <b>{abs(percentage_difference):.1f}% {sign_word}</b> engagements than the second most engaging platform, <b>{second_platform['Platform']}</b>.</li>")
             if len(platform_engagements) > 2:
                 insights.append(f"<li>The top three platforms combined account for a significant portion of overall engagements.</li>")
-            st.markdown("<ul>" + "".join(insights) + "</ul>", unsafe_allow_html=True)
+            render_insights(insights)
 
 
             # --- Media Type Mix (Pie Chart) ---
             st.header("6. Media Type Mix")
-            media_type_counts = df['Media Type'].value_counts().reset_index()
-            media_type_counts.columns = ['Media Type', 'Count']
-            fig_media_type = px.pie(
-                media_type_counts,
-                names='Media Type',
-                values='Count',
-                title='Media Type Mix',
-                hole=0.4,
-                color_discrete_sequence=px.colors.qualitative.Vivid
-            )
-            fig_media_type.update_traces(textinfo='percent+label', pull=[0.05 if mt == media_type_counts['Media Type'].iloc[0] else 0 for mt in media_type_counts['Media Type']])
-            st.plotly_chart(fig_media_type, use_container_width=True)
-
-            st.subheader("Top 3 Insights:")
+            media_type_counts = aggregates['media_type_counts']
+            fig_media_type = build_media_type_fig(media_type_counts)
+            st.plotly_chart(fig_media_type, use_container_width=True, config={'staticPlot': True})
+
             total_media_types = media_type_counts['Count'].sum()
             insights = []
-            if len(media_type_counts) > 0:
-                most_prevalent_media_type = media_type_counts.iloc[0]
+            top_media_types = media_type_counts.head(2).to_dict('records')
+            if len(top_media_types) > 0:
+                most_prevalent_media_type = top_media_types[0]
                 insights.append(f"<li>The most prevalent media type is <b>{most_prevalent_media_type['Media Type']}</b>, making up <b>{(most_prevalent_media_type['Count'] / total_media_types * 100):.1f}%</b> of the content.</li>")
-            if len(media_type_counts) > 1:
-                second_media_type = media_type_counts.iloc[1]
+            if len(top_media_types) > 1:
+                second_media_type = top_media_types[1]
                 insights.append(f"<li><b>{second_media_type['Media Type']}</b> is the second most used media type, comprising <b>{(second_media_type['Count'] / total_media_types * 100):.1f}%</b>.</li>")
-            if len(media_type_counts) > 0 and (media_type_counts.iloc[0]['Count'] / total_media_types) < 0.5:
+            if len(top_media_types) > 0 and (most_prevalent_media_type['Count'] / total_media_types) < 0.5:
                 insights.append('<li>The media mix is relatively diverse, with no single media type overwhelmingly dominating.</li>')
-            elif len(media_type_counts) > 0:
+            elif len(top_media_types) > 0:
                 insights.append('<li>The media mix is dominated by a few key types, with a high concentration in the leading category.</li>')
-            st.markdown("<ul>" + "".join(insights) + "</ul>", unsafe_allow_html=True)
+            render_insights(insights)
 
 
             # --- Top 5 Locations (Bar Chart) ---
             st.header("7. Top 5 Locations (by Engagements)")
-            engagements_by_location = df.groupby('Location')['Engagements'].sum().reset_index()
-            engagements_by_location = engagements_by_location.sort_values(by='Engagements', ascending=False).head(5)
-            fig_locations = px.bar(
-                engagements_by_location,
-                x='Location',
-                y='Engagements',
-                title='Top 5 Locations by Engagements',
-                color_discrete_sequence=['#d946ef'] # Purple-500
-            )
+            engagements_by_location = aggregates['engagements_by_location']
+            fig_locations = build_locations_fig(engagements_by_location)
             st.plotly_chart(fig_locations, use_container_width=True)
 
-            st.subheader("Top 3 Insights:")
             insights = []
-            if len(engagements_by_location) > 0:
-                highest_engagement_location = engagements_by_location.iloc[0]
+            top_locations = engagements_by_location.head(2).to_dict('records')
+            if len(top_locations) > 0:
+                highest_engagement_location = top_locations[0]
                 insights.append(f"<li><b>{highest_engagement_location['Location']}</b> is the highest-engagement location, with <b>{highest_engagement_location['Engagements']:,}</b> total engagements.</li>")
-            if len(engagements_by_location) > 1:
-                second_location = engagements_by_location.iloc[1]
+            if len(top_locations) > 1:
+                second_location = top_locations[1]
                 insights.append(f"<li>The top two locations, <b>{highest_engagement_location['Location']}</b> and <b>{second_location['Location']}</b>, together contribute a significant portion of overall engagements.</li>")
             if len(engagements_by_location) > 2:
                 insights.append(f"<li>The top 5 locations highlight key geographic areas for media engagement, suggesting targeted outreach opportunities.</li>")
-            st.markdown("<ul>" + "".join(insights) + "</ul>", unsafe_allow_html=True)
+            render_insights(insights)
 
     except Exception as e:
         st.error(f"An error occurred during processing: {e}")
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('streamlit')
+
+import Frostiq
+
+CSV_WITH_BLANKS = (
+    b"Date,Platform,Sentiment,Location,Engagements,Media Type\n"
+    b"2024-01-01,X,Positive,2134,5,\n"
+    b",X,Negative,2135,7,Video\n"
+    b"2024-01-03,Y,Positive,,3,Video\n"
+)
+
+
+def test_blank_cells_are_read_as_nan():
+    df, stats = next(Frostiq.read_clean_chunks(CSV_WITH_BLANKS))
+
+    # Blank text cells stay missing instead of turning into 'None'/'nan' labels
+    assert df['Media Type'].isna().sum() == 1
+    assert df['Location'].isna().sum() == 1
+    assert not {'None', 'nan', 'NaT'} & set(df['Media Type'].cat.categories)
+    # Numeric-looking text is kept as written, not round-tripped through float
+    assert list(df['Location'].cat.categories) == ['2134']
+    # A blank date drops the row but is not reported as an invalid date
+    assert stats['original_rows'] == 3
+    assert stats['cleaned_rows'] == 2
+    assert stats['invalid_date_count'] == 0
+
+
+def test_chunked_read_matches_single_read(monkeypatch):
+    # Sorted dd/mm dates: the first rows alone look like mm/dd, later ones only fit dd/mm
+    platforms = ['Twitter', 'Facebook', 'TikTok', 'Instagram']
+    sentiments = ['Positive', 'Negative', 'Neutral']
+    locations = ['Jakarta', 'Bandung', 'Surabaya', 'Medan', 'Bali', 'Depok', 'Bogor']
+    rows = [
+        f"{day:02d}/01/2024,{platforms[day % 4]},{sentiments[day % 3]},{locations[day % 7]},{day},Video".encode()
+        for day in range(1, 29)
+    ]
+    csv_bytes = b"Date,Platform,Sentiment,Location,Engagements,Media Type\n" + b"\n".join(rows) + b"\n"
+
+    results = []
+    for chunk_rows in (1_000, 5):
+        monkeypatch.setattr(Frostiq, 'CSV_CHUNK_ROWS', chunk_rows)
+        Frostiq.load_dashboard_data.clear()
+        results.append(Frostiq.load_dashboard_data(csv_bytes))
+
+    (single_stats, single_aggregates), (chunked_stats, chunked_aggregates) = results
+    assert single_stats == chunked_stats
+    assert single_aggregates.keys() == chunked_aggregates.keys()
+    for key, aggregate in single_aggregates.items():
+        pd.testing.assert_frame_equal(aggregate, chunked_aggregates[key])
+    # The dd/mm format sniffed from the head of the file applies to every chunk
+    assert single_stats['invalid_date_count'] == 0
+    assert (chunked_aggregates['engagement_by_date']['Date'].dt.month == 1).all()